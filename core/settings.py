@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 import environ
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -21,6 +22,21 @@ env.read_env(os.path.join(BASE_DIR, ".env"))
 
 SECRET_KEY = env("DJANGO_SECRET_KEY", default="dev-secret-key")
 DEBUG = env.bool("DEBUG", default=True)
+
+# Server-side secret keying API key hashes. Kept separate from SECRET_KEY so
+# rotating one doesn't invalidate every stored key; required outside DEBUG.
+API_KEY_PEPPER = env(
+    "API_KEY_PEPPER", default="dev-api-key-pepper" if DEBUG else None
+)
+if not API_KEY_PEPPER:
+    raise ImproperlyConfigured("API_KEY_PEPPER must be set when DEBUG is off")
+# BLAKE2b keys are at most 64 bytes
+if len(API_KEY_PEPPER.encode()) > 64:
+    raise ImproperlyConfigured("API_KEY_PEPPER must be at most 64 bytes")
+# Whether API keys still stored with a password hash are checked. Each
+# check scans every such key; turn it off once none are left, e.g.
+# APIKey.objects.filter(key_hash__contains="$").exists() is False.
+LEGACY_API_KEY_SCAN = env.bool("LEGACY_API_KEY_SCAN", default=True)
 ALLOWED_HOSTS = env.list("ALLOWED_HOSTS", default=["127.0.0.1", "localhost"])
 
 ALLOWED_HOSTS += [
@@ -35,6 +51,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     "rest_framework",
     "tenants",
     "notifications",
@@ -85,10 +102,39 @@ DATABASES = {
         "PASSWORD": env("DB_PASSWORD", default="notif_pass"),
         "HOST": env("DB_HOST", default="127.0.0.1"),
         "PORT": env("DB_PORT", default="5432"),
+        # Reuse connections across requests/tasks instead of reconnecting each time
+        "CONN_MAX_AGE": env.int("DB_CONN_MAX_AGE", default=60),
+        "CONN_HEALTH_CHECKS": True,
+        # Required behind PgBouncer in transaction pooling mode
+        "DISABLE_SERVER_SIDE_CURSORS": env.bool("DB_DISABLE_SERVER_SIDE_CURSORS", default=False),
     }
 }
 
 
+# Cache (template lookups, key failure counters, ...)
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Shared by all processes through Redis. Requests don't depend on it: while
+# Redis is unreachable it acts as an empty cache (see core_utils.cache),
+# and the short socket timeouts keep a hung server from stalling requests.
+
+CACHES = {
+    "default": {
+        "BACKEND": "core_utils.cache.FailOpenRedisCache",
+        "LOCATION": env("CACHE_URL", default="redis://127.0.0.1:6379/1"),
+        "OPTIONS": {
+            "socket_connect_timeout": 0.5,
+            "socket_timeout": 0.5,
+        },
+    }
+}
+
+# Reverse proxies in front of the app. Client addresses are read from
+# X-Forwarded-For past this many hops; 0 trusts only REMOTE_ADDR.
+REST_FRAMEWORK = {
+    "NUM_PROXIES": env.int("NUM_PROXIES", default=0),
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -138,7 +184,16 @@ EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD", default="")
 EMAIL_USE_TLS = env.bool("EMAIL_USE_TLS", default=True)
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# Directory for compiled Jinja template bytecode (defaults to a temp dir)
+JINJA_BYTECODE_CACHE_DIR = env("JINJA_BYTECODE_CACHE_DIR", default=None)
+
 CELERY_BROKER_URL = env("REDIS_URL", default="redis://127.0.0.1:6379/0")
 CELERY_RESULT_BACKEND = CELERY_BROKER_URL
+CELERY_BEAT_SCHEDULE = {
+    "flush-dead-letters": {
+        "task": "notifications.tasks.flush_dead_letters_task",
+        "schedule": 5.0,
+    },
+}
 
 
@@ -0,0 +1,106 @@
+"""
+Cache backend that keeps the API up while Redis is unreachable.
+"""
+import logging
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.redis import RedisCache
+from redis.exceptions import ConnectionError, TimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Errors meaning the server could not be reached, as opposed to a bad command
+UNAVAILABLE_ERRORS = (ConnectionError, TimeoutError)
+
+
+class FailOpenRedisCache(RedisCache):
+    """
+    RedisCache that behaves like an empty cache while Redis is unreachable.
+
+    Everything cached here can be rebuilt from the database (template
+    lookups) or is a short-lived counter (API key usage debounce, failed
+    key checks), so an outage shouldn't turn every request into a 500.
+    Reads miss, writes and deletes are dropped, add() reports the key as
+    added and incr() raises ValueError as for a missing key. get_or_set()
+    and decr() are built on these and fall through the same way.
+    """
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        try:
+            return super().add(key, value, timeout, version)
+        except UNAVAILABLE_ERRORS:
+            _log_unavailable("add")
+            return True
+
+    def get(self, key, default=None, version=None):
+        try:
+            return super().get(key, default, version)
+        except UNAVAILABLE_ERRORS:
+            _log_unavailable("get")
+            return default
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        try:
+            super().set(key, value, timeout, version)
+        except UNAVAILABLE_ERRORS:
+            _log_unavailable("set")
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        try:
+            return super().touch(key, timeout, version)
+        except UNAVAILABLE_ERRORS:
+            _log_unavailable("touch")
+            return False
+
+    def delete(self, key, version=None):
+        try:
+            return super().delete(key, version)
+        except UNAVAILABLE_ERRORS:
+            _log_unavailable("delete")
+            return False
+
+    def get_many(self, keys, version=None):
+        try:
+            return super().get_many(keys, version)
+        except UNAVAILABLE_ERRORS:
+            _log_unavailable("get_many")
+            return {}
+
+    def has_key(self, key, version=None):
+        try:
+            return super().has_key(key, version)
+        except UNAVAILABLE_ERRORS:
+            _log_unavailable("has_key")
+            return False
+
+    def incr(self, key, delta=1, version=None):
+        try:
+            return super().incr(key, delta, version)
+        except UNAVAILABLE_ERRORS:
+            _log_unavailable("incr")
+            raise ValueError(f"Key '{key}' not found") from None
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        try:
+            return super().set_many(data, timeout, version)
+        except UNAVAILABLE_ERRORS:
+            _log_unavailable("set_many")
+            return list(data)
+
+    def delete_many(self, keys, version=None):
+        try:
+            super().delete_many(keys, version)
+        except UNAVAILABLE_ERRORS:
+            _log_unavailable("delete_many")
+
+    def clear(self):
+        try:
+            return super().clear()
+        except UNAVAILABLE_ERRORS:
+            _log_unavailable("clear")
+            return False
+
+
+def _log_unavailable(operation: str) -> None:
+    # No traceback: during an outage this fires on every request
+    logger.warning("Cache unavailable, skipping %s", operation)
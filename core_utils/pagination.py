@@ -0,0 +1,20 @@
+"""
+Shared pagination classes for list endpoints.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Cursor pagination over (created_at, id), newest first.
+
+    Unlike LIMIT/OFFSET, a deep page costs the same as the first one:
+    each page is a range scan on a (tenant, -created_at, -id) index.
+    Clients can ask for up to max_page_size rows per page with ?limit=.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = 100
+    page_size_query_param = "limit"
+    max_page_size = 200
+    cursor_query_param = "cursor"
@@ -1,3 +1,56 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from notifications.models import Template
+from tenants.models import BusinessTenant
+from tenants.services import APIKeyService
+
+# Nothing listens on port 1, so every cache call fails to connect
+UNREACHABLE_CACHES = {
+    "default": {
+        "BACKEND": "core_utils.cache.FailOpenRedisCache",
+        "LOCATION": "redis://127.0.0.1:1/0",
+    }
+}
+
+
+@override_settings(CACHES=UNREACHABLE_CACHES)
+class FailOpenRedisCacheTests(TestCase):
+    def test_unreachable_server_acts_as_empty_cache(self):
+        with self.assertLogs("core_utils.cache", "WARNING"):
+            self.assertEqual(cache.get("key", "default"), "default")
+            self.assertTrue(cache.add("key", 1))
+            self.assertEqual(cache.get_many(["key"]), {})
+            self.assertEqual(cache.get_or_set("key", lambda: 2), 2)
+            with self.assertRaises(ValueError):
+                cache.incr("key")
+            cache.set("key", 1)
+            cache.delete_many(["key"])
+
+    @mock.patch("notifications.views.send_notification_task")
+    def test_requests_succeed_without_the_cache(self, task):
+        tenant = BusinessTenant.objects.create(name="Acme", email="ops@acme.test")
+        api_key, raw_key = APIKeyService.create_api_key(tenant)
+
+        with self.assertLogs("core_utils.cache", "WARNING"):
+            Template.objects.create(
+                tenant=tenant, name="welcome", channel="email",
+                subject="Hi", body="Hello {{ name }}",
+            )
+            me = self.client.get("/v1/tenants/me/", HTTP_X_API_KEY=raw_key)
+            notify = self.client.post(
+                "/v1/notify/",
+                {"channel": "email", "to": "user@example.com",
+                 "template": "welcome", "data": {"name": "Ada"}},
+                content_type="application/json",
+                HTTP_X_API_KEY=raw_key,
+            )
+
+        self.assertEqual(me.status_code, 200)
+        self.assertEqual(notify.status_code, 202)
+        task.delay.assert_called_once()
+        # The usage debounce is skipped, not the write
+        api_key.refresh_from_db()
+        self.assertIsNotNone(api_key.last_used_at)
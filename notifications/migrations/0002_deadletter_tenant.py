@@ -0,0 +1,40 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+        ('tenants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deadletter',
+            name='tenant',
+            field=models.ForeignKey(db_index=False, help_text='Tenant of the notification (denormalized for listing)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='dead_letters', to='tenants.businesstenant'),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE dead_letters dl
+                SET tenant_id = n.tenant_id
+                FROM notifications n
+                WHERE dl.notification_id = n.id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name='deadletter',
+            name='tenant',
+            field=models.ForeignKey(db_index=False, help_text='Tenant of the notification (denormalized for listing)', on_delete=django.db.models.deletion.CASCADE, related_name='dead_letters', to='tenants.businesstenant'),
+        ),
+        migrations.AddIndex(
+            model_name='deadletter',
+            index=models.Index(fields=['-created_at'], name='dl_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deadletter',
+            index=models.Index(fields=['tenant', '-created_at'], name='dl_tenant_created_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+from notifications.models import _to_format_string
+
+
+def fill_body_format(apps, schema_editor):
+    """Translate existing bodies, as Template.save() does for new ones."""
+    Template = apps.get_model('notifications', 'Template')
+    batch = []
+    for template in Template.objects.only('id', 'body').iterator(chunk_size=500):
+        template.body_format = _to_format_string(template.body)
+        batch.append(template)
+        if len(batch) == 500:
+            Template.objects.bulk_update(batch, ['body_format'])
+            batch = []
+    Template.objects.bulk_update(batch, ['body_format'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_deadletter_tenant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='template',
+            name='body_format',
+            field=models.TextField(blank=True, editable=False, help_text='Body precompiled for str.format_map when it only uses plain placeholders; null means render with Jinja', null=True),
+        ),
+        migrations.RunPython(fill_body_format, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_template_body_format'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='provider_response',
+            field=models.JSONField(blank=True, default=dict, help_text='Legacy provider response for notifications sent before NotificationProviderEvent was introduced'),
+        ),
+        migrations.CreateModel(
+            name='NotificationProviderEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(help_text='Provider that handled the send (email, twilio, etc.)', max_length=50)),
+                ('status', models.CharField(help_text='Status reported by the provider', max_length=50)),
+                ('message_id', models.CharField(blank=True, help_text='Provider message identifier, if exposed', max_length=255, null=True)),
+                ('detail', models.TextField(blank=True, help_text='Human-readable detail from the provider', null=True)),
+                ('raw', models.JSONField(blank=True, default=dict, help_text='Raw provider response payload')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('notification', models.ForeignKey(help_text='The notification this provider response belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='provider_events', to='notifications.notification')),
+            ],
+            options={
+                'verbose_name': 'Notification Provider Event',
+                'verbose_name_plural': 'Notification Provider Events',
+                'db_table': 'notification_provider_events',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
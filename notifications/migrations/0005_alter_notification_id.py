@@ -0,0 +1,17 @@
+import core_utils.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notificationproviderevent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='id',
+            field=models.UUIDField(default=core_utils.ids.uuid7, editable=False, help_text='Unique identifier for the notification (time-ordered UUIDv7)', primary_key=True, serialize=False),
+        ),
+    ]
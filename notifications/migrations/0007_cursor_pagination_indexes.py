@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_notification_to_trgm'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notificatio_tenant__f87df4_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['tenant', '-created_at', '-id'], name='notif_tenant_created_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='deadletter',
+            name='dl_tenant_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='deadletter',
+            index=models.Index(fields=['tenant', '-created_at', '-id'], name='dl_tenant_created_idx'),
+        ),
+    ]
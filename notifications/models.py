@@ -1,7 +1,59 @@
+import re
 import uuid
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.core.cache import cache
 from django.db import models
+from django.db.models.functions import Upper
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
 from django.core.validators import MinLengthValidator
+from core_utils.ids import uuid7
 from tenants.models import BusinessTenant
+from .rendering import GLOBAL_NAMES, precompile_template
+
+
+# A Jinja placeholder that is just a variable name, e.g. {{ name }}
+_SIMPLE_PLACEHOLDER_RE = re.compile(r'\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}')
+
+# Jinja syntax that cannot be expressed with str.format_map
+_JINJA_OPENERS = ('{{', '{%', '{#')
+
+# Names Jinja doesn't look up in the render data: literals, plus globals
+# that render as themselves when the data doesn't override them
+_JINJA_RESERVED_NAMES = {
+    'true', 'false', 'none', 'True', 'False', 'None', *GLOBAL_NAMES,
+}
+
+
+def _to_format_string(body: str) -> str | None:
+    """
+    Translate a template body into an equivalent str.format_map() string.
+    
+    Only bodies whose placeholders are all bare variable names qualify;
+    anything using filters, expressions or control flow returns None.
+    Mirrors Jinja's defaults: newlines are normalized to \\n and a single
+    trailing newline is dropped.
+    """
+    parts = _SIMPLE_PLACEHOLDER_RE.split(body)
+    
+    # split() alternates literal text and captured placeholder names
+    literals = parts[0::2]
+    if any(opener in text for text in literals for opener in _JINJA_OPENERS):
+        return None
+    if not _JINJA_RESERVED_NAMES.isdisjoint(parts[1::2]):
+        return None
+    
+    for i in range(0, len(parts), 2):
+        text = parts[i].replace('\r\n', '\n').replace('\r', '\n')
+        parts[i] = text.replace('{', '{{').replace('}', '}}')
+    for i in range(1, len(parts), 2):
+        parts[i] = '{' + parts[i] + '}'
+    
+    if parts[-1].endswith('\n'):
+        parts[-1] = parts[-1][:-1]
+    
+    return ''.join(parts)
 
 
 class Template(models.Model):
@@ -31,6 +83,11 @@ class Template(models.Model):
         validators=[MinLengthValidator(1)],
         help_text="Template body with variable placeholders (e.g., {{name}}, {{code}})"
     )
+    body_format = models.TextField(
+        blank=True, null=True, editable=False,
+        help_text="Body precompiled for str.format_map when it only uses "
+                  "plain placeholders; null means render with Jinja"
+    )
     variables = models.JSONField(
         default=dict, blank=True,
         help_text="JSON schema or description of expected variables"
@@ -50,6 +107,45 @@ class Template(models.Model):
     def __str__(self):
         return f"{self.name} ({self.channel}) - {self.tenant.name}"
 
+    # body_format is derived from body here, so updating body through a
+    # queryset (Template.objects.filter(...).update(body=...)) leaves it
+    # stale; set body_format=_to_format_string(body) in the same update.
+    def save(self, *args, **kwargs):
+        self.body_format = _to_format_string(self.body)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "body" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "body_format"}
+        super().save(*args, **kwargs)
+        self._invalidate_cache()
+        precompile_template(self)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored name, so a rename also invalidates it
+        instance._loaded_name = instance.__dict__.get("name")
+        return instance
+
+    @staticmethod
+    def active_cache_key(tenant_id, name: str) -> str:
+        """Cache key of TemplateService.get_active() for a template name."""
+        return f"tpl:{tenant_id}:{name}"
+
+    def _invalidate_cache(self):
+        """Drop cached lookups for this template's current and stored name."""
+        names = {self.name, getattr(self, "_loaded_name", None)} - {None}
+        cache.delete_many(
+            [self.active_cache_key(self.tenant_id, name) for name in names]
+        )
+        self._loaded_name = self.name
+
+
+@receiver(post_delete, sender=Template)
+def _invalidate_deleted_template(sender, instance, **kwargs):
+    # A signal rather than Template.delete(), so queryset deletes (e.g. the
+    # admin's "delete selected" action) and tenant cascades invalidate too
+    instance._invalidate_cache()
+
 
 class Notification(models.Model):
     STATUS_CHOICES = [
@@ -69,8 +165,8 @@ class Notification(models.Model):
     ]
 
     id = models.UUIDField(
-        primary_key=True, default=uuid.uuid4, editable=False,
-        help_text="Unique identifier for the notification"
+        primary_key=True, default=uuid7, editable=False,
+        help_text="Unique identifier for the notification (time-ordered UUIDv7)"
     )
     tenant = models.ForeignKey(
         BusinessTenant, on_delete=models.CASCADE, related_name="notifications",
@@ -98,13 +194,16 @@ class Notification(models.Model):
     )
     provider_response = models.JSONField(
         default=dict, blank=True,
-        help_text="Response from the provider (SES, Twilio, etc.) including delivery details"
+        help_text="Legacy provider response for notifications sent before "
+                  "NotificationProviderEvent was introduced"
     )
     error_message = models.TextField(
         blank=True, null=True,
         help_text="Error message if the notification failed"
     )
-    created_at = models.DateTimeField(auto_now_add=True)
+    # A default rather than auto_now_add: the API fixes the time a
+    # notification was accepted and the worker inserts the row with it
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
     sent_at = models.DateTimeField(
         null=True, blank=True,
@@ -117,14 +216,37 @@ class Notification(models.Model):
         verbose_name_plural = "Notifications"
         ordering = ["-created_at"]
         indexes = [
-            models.Index(fields=["tenant", "status"]),
-            models.Index(fields=["tenant", "created_at"]),
+            # Match the list endpoint's (-created_at, -id) cursor ordering,
+            # unfiltered and with its status / channel filters
+            models.Index(
+                fields=["tenant", "-created_at", "-id"],
+                name="notif_tenant_created_idx",
+            ),
+            models.Index(
+                fields=["tenant", "status", "-created_at", "-id"],
+                name="notif_tenant_status_idx",
+            ),
+            models.Index(
+                fields=["tenant", "channel", "-created_at", "-id"],
+                name="notif_tenant_channel_idx",
+            ),
             models.Index(fields=["status", "created_at"]),
+            # Trigram index for the admin's case-insensitive "contains"
+            # search on recipient, which compares UPPER("to")
+            GinIndex(
+                OpClass(Upper("to"), name="gin_trgm_ops"),
+                name="notifications_to_trgm",
+            ),
         ]
 
     def __str__(self):
         return f"Notification {self.id} - {self.channel} to {self.to} ({self.status})"
 
+    @staticmethod
+    def accepted_cache_key(tenant_id, notification_id) -> str:
+        """Cache key of an accepted notification the worker hasn't inserted yet."""
+        return f"notif_accepted:{tenant_id}:{notification_id}"
+
 
 class DeadLetter(models.Model):
     id = models.UUIDField(
@@ -134,6 +256,11 @@ class DeadLetter(models.Model):
         Notification, on_delete=models.CASCADE, related_name="dead_letter",
         help_text="The notification that failed permanently"
     )
+    tenant = models.ForeignKey(
+        BusinessTenant, on_delete=models.CASCADE, related_name="dead_letters",
+        db_index=False,
+        help_text="Tenant of the notification (denormalized for listing)"
+    )
     reason = models.TextField(
         help_text="Reason why this notification was moved to dead letter queue"
     )
@@ -148,6 +275,62 @@ class DeadLetter(models.Model):
         verbose_name = "Dead Letter"
         verbose_name_plural = "Dead Letters"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at"], name="dl_created_idx"),
+            models.Index(
+                fields=["tenant", "-created_at", "-id"],
+                name="dl_tenant_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Dead Letter for Notification {self.notification.id}"
+
+
+class NotificationProviderEvent(models.Model):
+    """
+    Append-only record of a provider's response to a send attempt.
+    
+    Kept in its own table so that the notifications row stays narrow and
+    status updates don't rewrite the raw provider payload.
+    """
+    notification = models.ForeignKey(
+        Notification, on_delete=models.CASCADE, related_name="provider_events",
+        help_text="The notification this provider response belongs to"
+    )
+    provider = models.CharField(
+        max_length=50, help_text="Provider that handled the send (email, twilio, etc.)"
+    )
+    status = models.CharField(
+        max_length=50, help_text="Status reported by the provider"
+    )
+    message_id = models.CharField(
+        max_length=255, blank=True, null=True,
+        help_text="Provider message identifier, if exposed"
+    )
+    detail = models.TextField(
+        blank=True, null=True, help_text="Human-readable detail from the provider"
+    )
+    raw = models.JSONField(
+        default=dict, blank=True, help_text="Raw provider response payload"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "notification_provider_events"
+        verbose_name = "Notification Provider Event"
+        verbose_name_plural = "Notification Provider Events"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.provider} {self.status} for Notification {self.notification_id}"
+
+    def to_dict(self) -> dict:
+        """Return the event in the ProviderResult.to_dict() shape."""
+        return {
+            "provider": self.provider,
+            "status": self.status,
+            "message_id": self.message_id,
+            "detail": self.detail,
+            "raw": self.raw,
+        }
@@ -3,7 +3,11 @@ Provider factory and registration.
 
 This module exposes a single `get_provider(channel)` function that returns
 an appropriate provider implementation for the given channel.
+
+Providers are created once per process and reused, so any connection they
+hold is shared across tasks running in the same worker.
 """
+from functools import lru_cache
 
 from .base import BaseProvider
 from .email_provider import EmailProvider
@@ -18,8 +22,12 @@ def get_provider(channel: str) -> BaseProvider:
 
     Other channels (sms, whatsapp, push) raise NotImplementedError for now.
     """
-    normalized = (channel or "").lower()
+    return _get_provider_cached((channel or "").lower())
+
 
+@lru_cache(maxsize=8)
+def _get_provider_cached(normalized: str) -> BaseProvider:
+    """Build the provider for a normalized channel name (memoized)."""
     if normalized == "email":
         return EmailProvider()
 
@@ -27,6 +35,6 @@ def get_provider(channel: str) -> BaseProvider:
     if normalized in {"sms", "whatsapp", "push"}:
         raise NotImplementedError(f"Provider for channel '{normalized}' is not implemented yet.")
 
-    raise ValueError(f"Unsupported channel: {channel}")
+    raise ValueError(f"Unsupported channel: {normalized}")
 
 
@@ -15,7 +15,7 @@ class ProviderResult:
     """
     Standardized result from a provider call.
 
-    This is stored in Notification.provider_response as JSON.
+    This is stored as a NotificationProviderEvent row.
     """
 
     provider: str
@@ -54,7 +54,7 @@ class BaseProvider:
         Send a notification.
 
         Returns:
-            A dict that will be stored in Notification.provider_response.
+            A ProviderResult.to_dict() dict, stored as a NotificationProviderEvent.
         """
         raise NotImplementedError("send() must be implemented by subclasses")
 
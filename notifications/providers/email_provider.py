@@ -8,6 +8,7 @@ This provider is intentionally simple and safe for a POC:
 from __future__ import annotations
 
 import logging
+import smtplib
 from typing import Any, Dict
 
 from django.conf import settings
@@ -19,10 +20,19 @@ logger = logging.getLogger(__name__)
 
 
 class EmailProvider(BaseProvider):
-    """Email provider backed by Django's email backend."""
+    """
+    Email provider backed by Django's email backend.
+
+    The backend connection is opened lazily, kept open on the instance and
+    reused across sends, so a worker pays the SMTP/TLS handshake once rather
+    than per email. It is dropped after a failed send and reopened on demand.
+    """
 
     name = "email"
 
+    def __init__(self):
+        self._connection = None
+
     def send(
         self,
         to: str,
@@ -56,7 +66,7 @@ class EmailProvider(BaseProvider):
             raise ValueError("DEFAULT_FROM_EMAIL is not configured")
 
         # Use Django's email backend connection
-        connection = get_connection()
+        connection = self._open_connection()
 
         message = EmailMultiAlternatives(
             subject=subject,
@@ -67,7 +77,13 @@ class EmailProvider(BaseProvider):
         )
 
         try:
-            sent_count = message.send(fail_silently=False)
+            try:
+                sent_count = message.send(fail_silently=False)
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped our idle connection; reconnect once
+                self._close_connection()
+                connection = message.connection = self._open_connection()
+                sent_count = message.send(fail_silently=False)
 
             # Do NOT log body or full recipient; keep logs privacy-friendly
             logger.info(
@@ -94,16 +110,24 @@ class EmailProvider(BaseProvider):
 
             return result.to_dict()
 
-        except Exception as exc:
-            # Log only minimal info to avoid leaking PII
-            logger.error(
-                "EmailProvider failed to send email",
-                exc_info=True,
-                extra={
-                    "provider": self.name,
-                    "to_domain": to.split("@")[-1] if "@" in to else None,
-                },
-            )
-            raise
+        except Exception:
+            # Don't reuse a connection that may be broken
+            self._close_connection()
 
+            # Logging is left to the caller, which knows whether the
+            # failure is final or will be retried
+            raise
 
+    def _open_connection(self):
+        """Return the provider's backend connection, opening it if needed."""
+        if self._connection is None:
+            self._connection = get_connection()
+        # No-op when the connection is already open
+        self._connection.open()
+        return self._connection
+
+    def _close_connection(self) -> None:
+        """Close and forget the provider's backend connection."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,176 @@
+"""
+Template rendering for notifications.
+
+Compiled templates are cached per process so the send path only pays for
+rendering, not for parsing and compiling the template source. The bytecode
+of Template rows is also written to a Jinja bytecode cache on disk, so a
+freshly started worker loads templates other processes on the host already
+compiled. Inline content stays out of it: every distinct source would add
+a file that is never evicted.
+"""
+import hashlib
+import logging
+from functools import lru_cache
+
+import jinja2
+from django.conf import settings
+
+# Size of the per-process compiled template caches
+TEMPLATE_CACHE_SIZE = 1024
+
+logger = logging.getLogger(__name__)
+
+# Process-wide Jinja2 environment, shared by every render in this process
+_env = jinja2.Environment(autoescape=False)
+
+# Names a template resolves without any render data: the environment's
+# globals (range, dict, lipsum, ...) and the template's own "self"
+GLOBAL_NAMES = frozenset(_env.globals) | {"self"}
+
+# Compiled (subject, body) pairs for Template rows, keyed by
+# (template_id, updated_at) so that edits invalidate automatically
+_template_cache: dict[tuple, tuple] = {}
+
+
+def render_notification(notification) -> tuple[str, str]:
+    """
+    Render the notification content.
+    
+    Only uses the in-memory notification (and its template), so it can
+    run on an unsaved instance.
+    
+    Returns:
+        Tuple of (subject, body)
+    """
+    data = notification.data or {}
+    template_data = data.get('template_data', {})
+    
+    if notification.template:
+        # Render from template
+        return render_template(notification.template, template_data)
+    else:
+        # Use inline content
+        inline_body = data.get('inline_body', '')
+        inline_subject = data.get('inline_subject', '')
+        
+        body = _compile(inline_body).render(**template_data)
+        subject = None
+        if inline_subject:
+            subject = _compile(inline_subject).render(**template_data)
+        
+        return subject, body
+
+
+def render_template(template, data: dict) -> tuple[str, str]:
+    """
+    Render a Template row with the given data.
+    
+    Shared by the send path and template previews, so both use the same
+    compiled template cache and produce the same output.
+    
+    Returns:
+        Tuple of (subject, body)
+    """
+    subject_tpl, body_tpl = _compile_template(template)
+    if template.body_format is not None:
+        # Fast path for bodies that only use plain placeholders
+        body = template.body_format.format_map(_SafeDict(data))
+    else:
+        body = body_tpl.render(**data)
+    subject = None
+    if subject_tpl is not None:
+        subject = subject_tpl.render(**data)
+    return subject, body
+
+
+class _SafeDict(dict):
+    """format_map() mapping that renders missing keys as '', like Jinja."""
+    
+    def __missing__(self, key):
+        return ''
+
+
+def precompile_template(template) -> None:
+    """
+    Compile a Template row ahead of its first send.
+    
+    Fills this process's cache and writes the bytecode cache, so workers
+    on the host skip parsing it. Invalid templates are ignored here; the
+    error surfaces when the template is rendered.
+    """
+    try:
+        _compile_template(template)
+    except jinja2.TemplateSyntaxError:
+        pass
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _compile(source: str) -> jinja2.Template:
+    """Compile an inline template source once per worker process."""
+    return _env.from_string(source)
+
+
+@lru_cache(maxsize=None)
+def _get_bytecode_cache() -> jinja2.FileSystemBytecodeCache | None:
+    """
+    Return the on-disk bytecode cache shared by processes on this host.
+    
+    Created on first use rather than at import, since Jinja creates and
+    checks the directory (with None, a private one under the system temp
+    dir). Returns None if that fails; templates are then compiled without
+    the cache instead of the process failing to start.
+    """
+    try:
+        return jinja2.FileSystemBytecodeCache(settings.JINJA_BYTECODE_CACHE_DIR)
+    except (OSError, RuntimeError):
+        logger.warning("Jinja bytecode cache unavailable", exc_info=True)
+        return None
+
+
+def _from_source(source: str) -> jinja2.Template:
+    """
+    Build a Template row's template from source via the bytecode cache.
+    
+    Environment.from_string() never consults the bytecode cache (only
+    loaders do), so this performs the same bucket lookup a loader would.
+    Buckets are keyed by name, so the source hash is used as the name.
+    The cache is only an optimization: if it can't be read or written,
+    the source is compiled directly.
+    """
+    bytecode_cache = _get_bytecode_cache()
+    if bytecode_cache is None:
+        return _env.from_string(source)
+    
+    name = hashlib.sha1(source.encode("utf-8")).hexdigest()
+    try:
+        bucket = bytecode_cache.get_bucket(_env, name, None, source)
+    except OSError:
+        logger.warning("Could not read Jinja bytecode cache", exc_info=True)
+        return _env.from_string(source)
+    
+    code = bucket.code
+    if code is None:
+        code = _env.compile(source)
+        bucket.code = code
+        try:
+            bytecode_cache.set_bucket(bucket)
+        except OSError:
+            logger.warning("Could not write Jinja bytecode cache", exc_info=True)
+    return _env.template_class.from_code(_env, code, _env.make_globals(None))
+
+
+def _compile_template(template) -> tuple:
+    """
+    Return the compiled (subject, body) pair for a Template row.
+    
+    Subject is None when the template has no subject.
+    """
+    key = (template.id, template.updated_at.timestamp())
+    compiled = _template_cache.get(key)
+    if compiled is None:
+        if len(_template_cache) >= TEMPLATE_CACHE_SIZE:
+            _template_cache.clear()
+        subject = _from_source(template.subject) if template.subject else None
+        compiled = (subject, _from_source(template.body))
+        _template_cache[key] = compiled
+    return compiled
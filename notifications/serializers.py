@@ -6,6 +6,48 @@ from rest_framework import serializers
 from .models import Template, Notification, DeadLetter
 
 
+_EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+_TEMPLATE_NAME_RE = re.compile(r'^[a-zA-Z][a-zA-Z0-9_]*$')
+
+
+def _is_valid_email(value: str) -> bool:
+    """Basic email validation."""
+    return _EMAIL_RE.fullmatch(value) is not None
+
+
+def _is_valid_phone(value: str) -> bool:
+    """
+    Basic phone validation (E.164 format).
+    
+    A '+' and 7-15 ASCII digits, the first non-zero. Checked with str
+    methods, which is cheaper than running a regex for this fixed shape.
+    """
+    digits = value[1:]
+    return (
+        value[:1] == '+'
+        and 7 <= len(digits) <= 15
+        and digits.isascii()
+        and digits.isdigit()
+        and digits[0] != '0'
+    )
+
+
+# Recipient format check per channel, with the error reported when it fails
+RECIPIENT_VALIDATORS = {
+    'email': _is_valid_email,
+    'sms': _is_valid_phone,
+    'whatsapp': _is_valid_phone,
+    'push': bool,
+}
+
+RECIPIENT_ERRORS = {
+    'email': 'Invalid email address format.',
+    'sms': 'Invalid phone number format. Use E.164 format (e.g., +1234567890).',
+    'whatsapp': 'Invalid phone number format. Use E.164 format (e.g., +1234567890).',
+    'push': 'Recipient address is required.',
+}
+
+
 class TemplateSerializer(serializers.ModelSerializer):
     """Serializer for Template model."""
     
@@ -26,7 +68,7 @@ class TemplateSerializer(serializers.ModelSerializer):
     
     def validate_name(self, value):
         """Validate template name format (alphanumeric and underscores)."""
-        if not re.match(r'^[a-zA-Z][a-zA-Z0-9_]*$', value):
+        if not _TEMPLATE_NAME_RE.match(value):
             raise serializers.ValidationError(
                 "Template name must start with a letter and contain only "
                 "letters, numbers, and underscores."
@@ -58,7 +100,13 @@ class TemplateCreateSerializer(TemplateSerializer):
 
 
 class NotificationSerializer(serializers.ModelSerializer):
-    """Serializer for Notification model."""
+    """
+    Serializer for Notification model.
+    
+    The detail view projects rows with views.NOTIFICATION_DETAIL_FIELDS and
+    the list view renders views.NOTIFICATION_LIST_VALUES without this
+    serializer; update both when adding fields here.
+    """
     
     template_name = serializers.CharField(source='template.name', read_only=True)
     
@@ -161,28 +209,12 @@ class NotifyRequestSerializer(serializers.Serializer):
             })
         
         # Validate recipient format
-        if channel == 'email':
-            if not self._is_valid_email(to):
-                raise serializers.ValidationError({
-                    'to': 'Invalid email address format.'
-                })
-        elif channel in ['sms', 'whatsapp']:
-            if not self._is_valid_phone(to):
-                raise serializers.ValidationError({
-                    'to': 'Invalid phone number format. Use E.164 format (e.g., +1234567890).'
-                })
+        if not RECIPIENT_VALIDATORS[channel](to):
+            raise serializers.ValidationError({
+                'to': RECIPIENT_ERRORS[channel]
+            })
         
         return data
-    
-    def _is_valid_email(self, email: str) -> bool:
-        """Basic email validation."""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email))
-    
-    def _is_valid_phone(self, phone: str) -> bool:
-        """Basic phone validation (E.164 format)."""
-        pattern = r'^\+[1-9]\d{6,14}$'
-        return bool(re.match(pattern, phone))
 
 
 class NotifyResponseSerializer(serializers.Serializer):
@@ -196,7 +228,12 @@ class NotifyResponseSerializer(serializers.Serializer):
 
 
 class DeadLetterSerializer(serializers.ModelSerializer):
-    """Serializer for DeadLetter model."""
+    """
+    Serializer for DeadLetter model.
+    
+    The dead letter list renders views.DEAD_LETTER_LIST_VALUES in this
+    shape without the serializer; update it when adding fields here.
+    """
     
     notification_id = serializers.UUIDField(source='notification.id')
     notification_channel = serializers.CharField(source='notification.channel')
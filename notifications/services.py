@@ -0,0 +1,62 @@
+"""
+Template lookup service.
+Resolves templates on the send path through the cache.
+"""
+from django.core.cache import cache
+
+from .models import Template
+
+
+class TemplateService:
+    """Service for resolving templates when sending notifications."""
+    
+    # Seconds a resolved template is cached. Template.save() and deletes
+    # invalidate it sooner; a queryset update() doesn't, so call
+    # _invalidate_cache() on the affected templates after one.
+    ACTIVE_TEMPLATE_CACHE_TTL = 300
+    
+    # Columns needed to render and reference a template
+    ACTIVE_TEMPLATE_FIELDS = (
+        'id',
+        'tenant_id',
+        'name',
+        'subject',
+        'body',
+        'body_format',
+        'updated_at',
+    )
+    
+    @classmethod
+    def get_active(cls, tenant_id, name: str) -> Template | None:
+        """
+        Return the tenant's active template with the given name.
+        
+        The row is cached under (tenant_id, name), including misses, so a
+        sender reusing one template doesn't query it on every notify. The
+        instance only has ACTIVE_TEMPLATE_FIELDS loaded.
+        
+        Args:
+            tenant_id: The tenant's primary key.
+            name: The template name.
+        
+        Returns:
+            The Template instance if found and active, None otherwise.
+        """
+        row = cache.get_or_set(
+            Template.active_cache_key(tenant_id, name),
+            lambda: Template.objects.filter(
+                tenant_id=tenant_id,
+                name=name,
+                is_active=True
+            ).values(*cls.ACTIVE_TEMPLATE_FIELDS).first(),
+            cls.ACTIVE_TEMPLATE_CACHE_TTL
+        )
+        if row is None:
+            return None
+        # from_db() takes values positionally, in concrete field order
+        field_names = [
+            f.attname for f in Template._meta.concrete_fields if f.attname in row
+        ]
+        return Template.from_db(
+            Template.objects.db, field_names, [row[name] for name in field_names]
+        )
@@ -1,10 +1,20 @@
 """
 Celery tasks for async notification processing.
 """
+import json
 import logging
+from functools import lru_cache
+
+import redis
 from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, IntegrityError
+from django.db.models import Subquery
 from django.utils import timezone
 
+from .rendering import render_notification
+
 logger = logging.getLogger(__name__)
 
 # Maximum retry attempts before moving to dead letter
@@ -13,6 +23,43 @@ MAX_RETRIES = 3
 # Retry delays (exponential backoff in seconds)
 RETRY_DELAYS = [60, 300, 900]  # 1 min, 5 min, 15 min
 
+# Delays (seconds) between attempts to insert a notification while the
+# database is unavailable. These are separate from MAX_RETRIES, since the
+# task message is the only copy of the notification until the insert
+# succeeds; together they cover an outage of almost two hours.
+INSERT_RETRY_DELAYS = [30, 60, 300, 900, 1800, 3600]
+
+# Longest error message persisted on a notification
+MAX_ERROR_LENGTH = 4000
+
+# Redis list buffering dead letters until flush_dead_letters_task persists them
+DEAD_LETTER_BUFFER_KEY = "dlq:pending"
+
+# Maximum number of buffered dead letters persisted per flush
+DEAD_LETTER_FLUSH_BATCH = 500
+
+# Redis lock keeping flushes from overlapping, and how long (seconds) it
+# is held at most if a flushing worker dies
+DEAD_LETTER_FLUSH_LOCK_KEY = "dlq:flush-lock"
+DEAD_LETTER_FLUSH_LOCK_TIMEOUT = 60
+
+# Largest rendered body sent inline in the task payload; bigger messages are
+# re-read from the database by the worker instead of bloating the broker
+MAX_PAYLOAD_BODY_LENGTH = 16 * 1024
+
+# Notification columns needed to render and send it
+RENDER_FIELDS = (
+    'tenant',
+    'channel',
+    'to',
+    'data',
+    'template',
+    'template__subject',
+    'template__body',
+    'template__body_format',
+    'template__updated_at',
+)
+
 
 @shared_task(
     bind=True,
@@ -21,129 +68,367 @@ RETRY_DELAYS = [60, 300, 900]  # 1 min, 5 min, 15 min
     retry_backoff_max=900,
     retry_jitter=True,
     max_retries=MAX_RETRIES,
+    # The broker message is the only copy of a notification until the task
+    # inserts it, so only ack once the task is done and requeue it if the
+    # worker dies; the insert and the claim make a rerun safe
+    acks_late=True,
+    reject_on_worker_lost=True,
 )
-def send_notification_task(self, notification_id: str):
+def send_notification_task(
+    self,
+    notification_id: str,
+    payload: dict | None = None,
+    record: dict | None = None,
+    insert_attempt: int = 0,
+):
     """
     Process and send a notification.
     
     This task:
-    1. Fetches the notification from the database
-    2. Renders the template (if using a template)
-    3. Selects the appropriate provider
-    4. Sends the notification
-    5. Updates the notification status
-    6. On failure, retries or moves to dead letter queue
+    1. Creates the notification row (if a record is given)
+    2. Claims the notification, skipping it if it is already sent or failed
+    3. Fetches it from the database (unless a payload is given)
+    4. Renders the template (if using a template)
+    5. Selects the appropriate provider
+    6. Sends the notification
+    7. Updates the notification status
+    8. On failure, retries or moves to dead letter queue
+    
+    Args:
+        notification_id: ID of the notification to send.
+        payload: Optional pre-rendered message built by build_task_payload().
+            When given, the worker sends it without loading the notification.
+        record: Optional column values built by build_task_record(). When
+            given, the notification is inserted here rather than by the API
+            request; redeliveries and retries find it already in place.
+        insert_attempt: Number of earlier attempts that failed to insert
+            the record (see INSERT_RETRY_DELAYS).
     """
-    from .models import Notification, DeadLetter
+    from .models import Notification, NotificationProviderEvent
     from .providers import get_provider
     
-    try:
-        notification = Notification.objects.select_related(
-            'tenant', 'template'
-        ).get(id=notification_id)
-    except Notification.DoesNotExist:
-        logger.error(f"Notification {notification_id} not found")
-        return
+    if record is not None:
+        # A single INSERT ... ON CONFLICT DO NOTHING, rather than
+        # get_or_create()'s SELECT plus INSERT in a savepoint
+        try:
+            Notification.objects.bulk_create(
+                [Notification(id=notification_id, **_resolve_template(record))],
+                ignore_conflicts=True,
+            )
+        except IntegrityError:
+            # E.g. the tenant was deleted; retrying won't help
+            _drop_record(notification_id, record)
+            return
+        except DatabaseError:
+            _retry_insert(notification_id, payload, record, insert_attempt)
+            return
     
-    # Skip if already processed
-    if notification.status in ['sent', 'delivered']:
-        logger.info(f"Notification {notification_id} already sent")
+    # Claim the notification in a single UPDATE. Zero rows means it was
+    # already sent, failed for good, or deleted, so a redelivered task
+    # doesn't send it twice. updated_at is left alone for this internal
+    # transition and only moves when a user-visible state is reached.
+    claimed = Notification.objects.filter(
+        id=notification_id, status__in=['pending', 'processing']
+    ).update(status='processing')
+    if not claimed:
+        logger.info(f"Notification {notification_id} already processed or missing")
         return
     
-    # Update status to processing
-    notification.status = 'processing'
-    notification.save(update_fields=['status', 'updated_at'])
+    if payload is None:
+        try:
+            notification = Notification.objects.select_related('template').only(
+                *RENDER_FIELDS
+            ).get(id=notification_id)
+        except Notification.DoesNotExist:
+            logger.error(f"Notification {notification_id} not found")
+            return
+        
+        channel = notification.channel
+        to = notification.to
+        tenant_id = notification.tenant_id
+    else:
+        channel = payload['channel']
+        to = payload['to']
+        tenant_id = payload['tenant_id']
     
     try:
         # Render the message content
-        subject, body = _render_notification(notification)
+        if payload is None:
+            subject, body = render_notification(notification)
+        else:
+            subject, body = payload['subject'], payload['body']
         
         # Get the appropriate provider
-        provider = get_provider(notification.channel)
+        provider = get_provider(channel)
         
         # Send the notification
         result = provider.send(
-            to=notification.to,
+            to=to,
             subject=subject,
             body=body,
-            channel=notification.channel,
+            channel=channel,
         )
         
-        # Update notification with success
-        notification.status = 'sent'
-        notification.sent_at = timezone.now()
-        notification.provider_response = result
-        notification.save(update_fields=[
-            'status', 'sent_at', 'provider_response', 'updated_at'
-        ])
+        # Record the provider response and mark the notification sent
+        NotificationProviderEvent.objects.create(
+            notification_id=notification_id, **result
+        )
+        now = timezone.now()
+        Notification.objects.filter(id=notification_id).update(
+            status='sent', sent_at=now, updated_at=now
+        )
         
         logger.info(f"Notification {notification_id} sent successfully")
         
     except Exception as e:
-        logger.error(f"Failed to send notification {notification_id}: {str(e)}")
-        
-        # Update error message
-        notification.error_message = str(e)
-        notification.save(update_fields=['error_message', 'updated_at'])
-        
         # Check if we should retry or move to dead letter
         retry_count = self.request.retries
         
         if retry_count >= MAX_RETRIES:
+            # Only the terminal failure gets the full traceback
+            logger.error(
+                f"Failed to send notification {notification_id} after "
+                f"{retry_count} retries: {str(e)}",
+                exc_info=True,
+            )
             # Move to dead letter queue
-            _move_to_dead_letter(notification, str(e), retry_count)
+            _move_to_dead_letter(
+                notification_id, tenant_id, str(e)[:MAX_ERROR_LENGTH], retry_count
+            )
         else:
+            # Cheap log for attempts that will be retried; during a provider
+            # outage these fire thousands of times
+            logger.debug(
+                "Notification %s attempt %d failed, retrying",
+                notification_id, retry_count + 1,
+            )
+            # Record the first error only; intermediate retries skip the
+            # write and the final error is persisted with the dead letter.
+            # exclude() turns it into a no-op when the message is unchanged.
+            if retry_count == 0:
+                error_message = str(e)[:MAX_ERROR_LENGTH]
+                Notification.objects.filter(id=notification_id).exclude(
+                    error_message=error_message
+                ).update(error_message=error_message, updated_at=timezone.now())
             # Re-raise to trigger retry
             raise
 
 
-def _render_notification(notification) -> tuple[str, str]:
+def build_task_payload(notification) -> dict | None:
     """
-    Render the notification content.
+    Build the send_notification_task payload for a notification.
     
-    Returns:
-        Tuple of (subject, body)
+    Renders the message up front so the worker can send it without reading
+    the notification back. Returns None when the message should be rendered
+    by the worker instead: if rendering fails (so the error goes through the
+    normal retry and dead letter handling) or the body is too large to
+    carry in the broker message.
     """
-    from jinja2 import Template as Jinja2Template
+    try:
+        subject, body = render_notification(notification)
+    except Exception:
+        return None
     
-    data = notification.data or {}
-    template_data = data.get('template_data', {})
+    if len(body) > MAX_PAYLOAD_BODY_LENGTH:
+        return None
     
-    if notification.template:
-        # Render from template
-        template = notification.template
-        body = Jinja2Template(template.body).render(**template_data)
-        subject = None
-        if template.subject:
-            subject = Jinja2Template(template.subject).render(**template_data)
-        return subject, body
-    else:
-        # Use inline content
-        inline_body = data.get('inline_body', '')
-        inline_subject = data.get('inline_subject', '')
+    return {
+        'channel': notification.channel,
+        'to': notification.to,
+        'subject': subject,
+        'body': body,
+        'tenant_id': str(notification.tenant_id),
+    }
+
+
+def build_task_record(notification) -> dict:
+    """
+    Build the send_notification_task record for an unsaved notification.
+    
+    Holds the column values the worker needs to insert the notification,
+    so the API request doesn't have to.
+    """
+    return {
+        'tenant_id': str(notification.tenant_id),
+        'template_id': notification.template_id,
+        'channel': notification.channel,
+        'to': notification.to,
+        'data': notification.data,
+        'status': notification.status,
+        'created_at': notification.created_at.isoformat(),
+    }
+
+
+def _retry_insert(
+    notification_id: str, payload: dict | None, record: dict, attempt: int
+) -> None:
+    """
+    Schedule another attempt at inserting a notification.
+    
+    Re-enqueues the task rather than using self.retry(), so that attempts
+    spent waiting for the database don't use up the send's MAX_RETRIES.
+    Once INSERT_RETRY_DELAYS is exhausted the notification is dropped.
+    """
+    if attempt >= len(INSERT_RETRY_DELAYS):
+        _drop_record(notification_id, record)
+        return
+    
+    logger.warning(
+        "Could not insert notification %s (attempt %d), retrying",
+        notification_id, attempt + 1, exc_info=True,
+    )
+    send_notification_task.apply_async(
+        args=(notification_id,),
+        kwargs={
+            'payload': payload,
+            'record': record,
+            'insert_attempt': attempt + 1,
+        },
+        countdown=INSERT_RETRY_DELAYS[attempt],
+    )
+
+
+def _drop_record(notification_id: str, record: dict) -> None:
+    """
+    Give up on a notification that could not be inserted.
+    
+    The record is logged in full, as it is the last copy of the
+    notification.
+    """
+    from .models import Notification
+    
+    logger.error(
+        "Dropping notification %s, it could not be inserted; record: %s",
+        notification_id, json.dumps(record, default=str), exc_info=True,
+    )
+    cache.delete(
+        Notification.accepted_cache_key(record['tenant_id'], notification_id)
+    )
+
+
+def _resolve_template(record: dict) -> dict:
+    """
+    Return the record with its template resolved inside the INSERT.
+    
+    The template is looked up by a subquery in the same statement, so a
+    template deleted after the API accepted the notification is stored as
+    NULL (as on_delete=SET_NULL would have done) instead of failing the
+    insert on the foreign key.
+    """
+    from .models import Template
+    
+    template_id = record.get('template_id')
+    if template_id is None:
+        return record
+    
+    return {
+        **record,
+        'template_id': Subquery(
+            Template.objects.filter(pk=template_id).order_by().values('pk')
+        ),
+    }
+
+
+@shared_task
+def flush_dead_letters_task():
+    """
+    Persist buffered dead letters in bulk.
+    
+    Runs periodically via Celery beat. Each run persists up to
+    DEAD_LETTER_FLUSH_BATCH entries with one bulk INSERT, instead of one
+    INSERT per failed notification. Entries are only removed from the
+    buffer once the INSERT succeeded, so a worker dying mid-flush loses
+    nothing; the next run picks them up again.
+    """
+    from .models import Notification, DeadLetter
+    
+    client = _redis_client()
+    lock = client.lock(DEAD_LETTER_FLUSH_LOCK_KEY, timeout=DEAD_LETTER_FLUSH_LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        # Another flush is still running
+        return
+    
+    try:
+        entries = client.lrange(DEAD_LETTER_BUFFER_KEY, 0, DEAD_LETTER_FLUSH_BATCH - 1)
+        if not entries:
+            return
+        
+        dead_letters = {}
+        for raw in entries:
+            entry = json.loads(raw)
+            dead_letters[entry['notification_id']] = DeadLetter(
+                notification_id=entry['notification_id'],
+                tenant_id=entry['tenant_id'],
+                reason=entry['reason'],
+                retry_count=entry['retry_count'],
+            )
         
-        body = Jinja2Template(inline_body).render(**template_data)
-        subject = None
-        if inline_subject:
-            subject = Jinja2Template(inline_subject).render(**template_data)
+        # Skip notifications deleted since they failed (e.g. with their
+        # tenant); their foreign key would fail the whole batch every run
+        existing = {
+            str(pk) for pk in Notification.objects.filter(
+                id__in=dead_letters.keys()
+            ).values_list('id', flat=True)
+        }
+        missing = dead_letters.keys() - existing
+        if missing:
+            logger.warning(
+                f"Dropping {len(missing)} dead letters for deleted notifications"
+            )
         
-        return subject, body
+        DeadLetter.objects.bulk_create(
+            [dl for nid, dl in dead_letters.items() if nid in existing],
+            ignore_conflicts=True,
+        )
+        client.ltrim(DEAD_LETTER_BUFFER_KEY, len(entries), -1)
+    finally:
+        lock.release()
+    
+    logger.info(f"Flushed {len(existing)} dead letters")
 
 
-def _move_to_dead_letter(notification, reason: str, retry_count: int):
-    """Move a failed notification to the dead letter queue."""
-    from .models import DeadLetter
+def _move_to_dead_letter(
+    notification_id: str, tenant_id: str, reason: str, retry_count: int
+):
+    """
+    Move a failed notification to the dead letter queue.
     
-    notification.status = 'failed'
-    notification.save(update_fields=['status', 'updated_at'])
+    The notification is marked failed right away, so a redelivered task
+    can no longer claim and send it. The DeadLetter entry is buffered in
+    Redis and persisted by flush_dead_letters_task; if Redis is unavailable
+    it is written to the database directly.
+    """
+    from .models import Notification, DeadLetter
     
-    DeadLetter.objects.create(
-        notification=notification,
-        reason=reason,
-        retry_count=retry_count,
+    Notification.objects.filter(id=notification_id).update(
+        status='failed', error_message=reason, updated_at=timezone.now()
     )
     
+    entry = json.dumps({
+        'notification_id': str(notification_id),
+        'tenant_id': str(tenant_id),
+        'reason': reason,
+        'retry_count': retry_count,
+    })
+    
+    try:
+        _redis_client().rpush(DEAD_LETTER_BUFFER_KEY, entry)
+    except redis.RedisError:
+        logger.exception("Could not buffer dead letter, writing it directly")
+        
+        DeadLetter.objects.create(
+            notification_id=notification_id,
+            tenant_id=tenant_id,
+            reason=reason,
+            retry_count=retry_count,
+        )
+    
     logger.warning(
-        f"Notification {notification.id} moved to dead letter queue: {reason}"
+        f"Notification {notification_id} moved to dead letter queue: {reason}"
     )
 
+
+@lru_cache(maxsize=1)
+def _redis_client() -> redis.Redis:
+    """Return the worker's Redis client (same instance as the Celery broker)."""
+    return redis.Redis.from_url(settings.CELERY_BROKER_URL)
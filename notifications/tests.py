@@ -1,3 +1,423 @@
-from django.test import TestCase
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+import jinja2
+from django.contrib import admin
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from tenants.models import BusinessTenant
+from tenants.services import APIKeyService
+from .models import DeadLetter, Notification, Template, _to_format_string
+from . import rendering
+from .rendering import _SafeDict, render_template
+from .services import TemplateService
+from .tasks import (
+    INSERT_RETRY_DELAYS,
+    build_task_payload,
+    build_task_record,
+    send_notification_task,
+)
+
+# Keeps tests off the shared Redis cache
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class QueryCountTests(TestCase):
+    """The list and detail endpoints must not query per row."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = BusinessTenant.objects.create(name="Acme", email="ops@acme.test")
+        _, cls.raw_key = APIKeyService.create_api_key(cls.tenant)
+        template = Template.objects.create(
+            tenant=cls.tenant, name="welcome", channel="email",
+            subject="Hi", body="Hello {{ name }}",
+        )
+        cls.notifications = [
+            Notification.objects.create(
+                tenant=cls.tenant, template=template if i % 2 else None,
+                channel="email", to=f"user{i}@example.com", status="failed",
+            )
+            for i in range(5)
+        ]
+        for notification in cls.notifications:
+            DeadLetter.objects.create(
+                notification=notification, tenant=cls.tenant,
+                reason="SMTP error", retry_count=3,
+            )
+
+    def setUp(self):
+        cache.clear()
+        # The first request writes last_used_at; later ones only read the key
+        self.get("/v1/tenants/me/")
+
+    def get(self, path):
+        return self.client.get(path, HTTP_X_API_KEY=self.raw_key)
+
+    def test_notification_list(self):
+        # API key lookup, then one page query
+        with self.assertNumQueries(2):
+            response = self.get("/v1/notifications/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 5)
+
+    def test_notification_detail(self):
+        notification = self.notifications[1]
+        with self.assertNumQueries(2):
+            response = self.get(f"/v1/notifications/{notification.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["template_name"], "welcome")
+
+    def test_dead_letter_list(self):
+        with self.assertNumQueries(2):
+            response = self.get("/v1/dead-letters/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 5)
+
+
+class FormatStringTests(TestCase):
+    """Bodies rendered via body_format must match what Jinja renders."""
+
+    env = jinja2.Environment(autoescape=False)
+    data = {"name": "Ada", "company": "Acme"}
+
+    def assertMatchesJinja(self, body):
+        fmt = _to_format_string(body)
+        self.assertIsNotNone(fmt, body)
+        self.assertEqual(
+            fmt.format_map(_SafeDict(self.data)),
+            self.env.from_string(body).render(**self.data),
+            body,
+        )
+
+    def test_simple_placeholders_match_jinja(self):
+        for body in [
+            "Hello {{ name }}",
+            "{{name}} at {{  company  }}",
+            "No placeholders",
+            "Braces { } and {name} stay literal",
+            "Missing {{ nope }} renders empty",
+            "Windows\r\nand old Mac\rline endings",
+            "One trailing newline is dropped\n",
+            "Only one of two\n\n",
+            "",
+        ]:
+            with self.subTest(body=body):
+                self.assertMatchesJinja(body)
+
+    def test_other_jinja_syntax_is_not_translated(self):
+        for body in [
+            "{{ name|upper }}",
+            "{{ name ~ company }}",
+            "{% if name %}hi{% endif %}",
+            "{# comment #}{{ name }}",
+            "{{ true }}",
+            "{{ none }}",
+            "{{ range }}",
+            "{{ dict }}",
+            "{{ lipsum }}",
+            "{{ cycler }}",
+            "{{ joiner }}",
+            "{{ namespace }}",
+            "{{ self }}",
+        ]:
+            with self.subTest(body=body):
+                self.assertIsNone(_to_format_string(body))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BytecodeCacheTests(TestCase):
+    """The bytecode cache is an optimization; failures must not break sends."""
+
+    def setUp(self):
+        self.tenant = BusinessTenant.objects.create(name="Acme", email="ops@acme.test")
+        # A fresh cache directory, so every template misses the cache
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(JINJA_BYTECODE_CACHE_DIR=cache_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        rendering._template_cache.clear()
+        rendering._get_bytecode_cache.cache_clear()
+        self.addCleanup(rendering._get_bytecode_cache.cache_clear)
+
+    def create_and_render(self, body):
+        template = Template.objects.create(
+            tenant=self.tenant, name="welcome", channel="email",
+            subject="Hi {{ name }}", body=body,
+        )
+        return render_template(template, {"name": "Ada"})
+
+    def test_unwritable_cache_falls_back_to_compiling(self):
+        with mock.patch.object(
+            jinja2.FileSystemBytecodeCache, "dump_bytecode",
+            side_effect=PermissionError,
+        ), self.assertLogs("notifications.rendering", "WARNING"):
+            subject, body = self.create_and_render("{{ name|upper }}")
+        self.assertEqual((subject, body), ("Hi Ada", "ADA"))
+
+    def test_unusable_cache_dir_falls_back_to_compiling(self):
+        with mock.patch.object(
+            jinja2, "FileSystemBytecodeCache",
+            side_effect=RuntimeError("Cannot determine safe temp directory."),
+        ), self.assertLogs("notifications.rendering", "WARNING"):
+            subject, body = self.create_and_render("{{ name|lower }}")
+        self.assertEqual((subject, body), ("Hi Ada", "ada"))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch("notifications.providers.get_provider")
+class SendClaimTests(TestCase):
+    """A redelivered or repeated task must not send a notification twice."""
+
+    def setUp(self):
+        self.tenant = BusinessTenant.objects.create(name="Acme", email="ops@acme.test")
+
+    def build(self, **kwargs):
+        return Notification(
+            tenant=self.tenant, channel="email", to="user@example.com",
+            data={"inline_subject": "Hi", "inline_body": "Hello"}, **kwargs
+        )
+
+    def sent_provider(self, get_provider):
+        provider = get_provider.return_value
+        provider.send.return_value = {"provider": "email", "status": "sent"}
+        return provider
+
+    def test_redelivered_task_sends_once(self, get_provider):
+        provider = self.sent_provider(get_provider)
+        notification = self.build()
+        args = (
+            str(notification.id),
+            build_task_payload(notification),
+            build_task_record(notification),
+        )
+
+        send_notification_task(*args)
+        send_notification_task(*args)
+
+        self.assertEqual(provider.send.call_count, 1)
+        notification = Notification.objects.get(id=notification.id)
+        self.assertEqual(notification.status, "sent")
+        self.assertEqual(notification.provider_events.count(), 1)
+
+    def test_finished_notifications_are_skipped(self, get_provider):
+        provider = self.sent_provider(get_provider)
+        for final_status in ("sent", "failed"):
+            notification = self.build(status=final_status)
+            notification.save()
+            with self.subTest(status=final_status):
+                send_notification_task(str(notification.id))
+                provider.send.assert_not_called()
+
+    def test_deleted_notification_is_skipped(self, get_provider):
+        provider = self.sent_provider(get_provider)
+        notification = self.build()
+        notification.save()
+        notification_id = str(notification.id)
+        notification.delete()
+
+        send_notification_task(notification_id)
+
+        provider.send.assert_not_called()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch("notifications.providers.get_provider")
+class RecordInsertTests(TestCase):
+    """The worker inserts notifications accepted by /v1/notify/."""
+
+    def setUp(self):
+        cache.clear()
+        self.tenant = BusinessTenant.objects.create(name="Acme", email="ops@acme.test")
+        self.template = Template.objects.create(
+            tenant=self.tenant, name="welcome", channel="email",
+            subject="Hi", body="Hello {{ name }}",
+        )
+        self.notification = Notification(
+            tenant=self.tenant, template=self.template, channel="email",
+            to="user@example.com", data={"template_data": {"name": "Ada"}},
+        )
+        self.args = (
+            str(self.notification.id),
+            build_task_payload(self.notification),
+            build_task_record(self.notification),
+        )
+
+    def sent_provider(self, get_provider):
+        provider = get_provider.return_value
+        provider.send.return_value = {"provider": "email", "status": "sent"}
+        return provider
+
+    def test_insert_keeps_the_accepted_created_at(self, get_provider):
+        self.sent_provider(get_provider)
+
+        send_notification_task(*self.args)
+
+        row = Notification.objects.get(id=self.notification.id)
+        self.assertEqual(row.created_at, self.notification.created_at)
+        self.assertEqual(row.template_id, self.template.id)
+        self.assertEqual(row.status, "sent")
+
+    def test_redelivery_inserts_once(self, get_provider):
+        provider = self.sent_provider(get_provider)
+
+        send_notification_task(*self.args)
+        send_notification_task(*self.args)
+
+        self.assertEqual(
+            Notification.objects.filter(id=self.notification.id).count(), 1
+        )
+        self.assertEqual(provider.send.call_count, 1)
+
+    def test_deleted_template_is_stored_as_null(self, get_provider):
+        provider = self.sent_provider(get_provider)
+        self.template.delete()
+
+        send_notification_task(*self.args)
+
+        row = Notification.objects.get(id=self.notification.id)
+        self.assertIsNone(row.template_id)
+        self.assertEqual(row.status, "sent")
+        provider.send.assert_called_once()
+
+    def test_insert_failure_is_retried_outside_max_retries(self, get_provider):
+        provider = self.sent_provider(get_provider)
+        with mock.patch.object(
+            Notification.objects, "bulk_create", side_effect=OperationalError
+        ), mock.patch.object(
+            send_notification_task, "apply_async"
+        ) as apply_async, self.assertLogs("notifications.tasks", "WARNING"):
+            send_notification_task(*self.args, insert_attempt=1)
+
+        apply_async.assert_called_once()
+        _, kwargs = apply_async.call_args
+        self.assertEqual(kwargs["countdown"], INSERT_RETRY_DELAYS[1])
+        self.assertEqual(kwargs["kwargs"]["insert_attempt"], 2)
+        self.assertEqual(kwargs["kwargs"]["record"], self.args[2])
+        provider.send.assert_not_called()
+
+    def test_exhausted_insert_retries_log_the_record(self, get_provider):
+        with mock.patch.object(
+            Notification.objects, "bulk_create", side_effect=OperationalError
+        ), mock.patch.object(
+            send_notification_task, "apply_async"
+        ) as apply_async, self.assertLogs("notifications.tasks", "ERROR") as logs:
+            send_notification_task(
+                *self.args, insert_attempt=len(INSERT_RETRY_DELAYS)
+            )
+
+        apply_async.assert_not_called()
+        self.assertIn(str(self.notification.id), logs.output[0])
+        self.assertIn("user@example.com", logs.output[0])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch("notifications.views.send_notification_task")
+class NotifyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = BusinessTenant.objects.create(name="Acme", email="ops@acme.test")
+        _, self.raw_key = APIKeyService.create_api_key(self.tenant)
+
+    def test_accepted_notification_is_readable_before_insert(self, task):
+        before = timezone.now()
+        response = self.client.post(
+            "/v1/notify/",
+            {"channel": "email", "to": "user@example.com",
+             "subject": "Hi", "body": "Hello"},
+            content_type="application/json",
+            HTTP_X_API_KEY=self.raw_key,
+        )
+        self.assertEqual(response.status_code, 202)
+        accepted = response.json()
+        # The worker inserts the row with the created_at the client got
+        record = task.delay.call_args.kwargs["record"]
+        created_at = parse_datetime(accepted["created_at"])
+        self.assertEqual(parse_datetime(record["created_at"]), created_at)
+        self.assertGreaterEqual(created_at, before)
+
+        detail = self.client.get(
+            f"/v1/notifications/{accepted['id']}/", HTTP_X_API_KEY=self.raw_key
+        )
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(detail.json()["status"], "pending")
+        self.assertEqual(detail.json()["created_at"], accepted["created_at"])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class NotificationAdminSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.acme = BusinessTenant.objects.create(name="Acme", email="ops@acme.test")
+        cls.globex = BusinessTenant.objects.create(name="Globex", email="ops@globex.test")
+        cls.to_acme = Notification.objects.create(
+            tenant=cls.acme, channel="email", to="ada@example.com"
+        )
+        cls.to_globex = Notification.objects.create(
+            tenant=cls.globex, channel="email", to="bob@example.com"
+        )
+
+    def search(self, term):
+        model_admin = admin.site._registry[Notification]
+        results, _ = model_admin.get_search_results(
+            None, Notification.objects.all(), term
+        )
+        return set(results)
+
+    def test_search_by_recipient(self):
+        self.assertEqual(self.search("ada@"), {self.to_acme})
+
+    def test_search_by_tenant_name(self):
+        self.assertEqual(self.search("glob"), {self.to_globex})
+
+    def test_search_by_id(self):
+        self.assertEqual(self.search(str(self.to_globex.id)), {self.to_globex})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TemplateServiceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = BusinessTenant.objects.create(name="Acme", email="ops@acme.test")
+        self.template = Template.objects.create(
+            tenant=self.tenant, name="welcome", channel="email",
+            subject="Subject {{ name }}", body="Body {{ name }}",
+        )
+
+    def test_fields_are_loaded_whatever_their_order(self):
+        fields = tuple(reversed(TemplateService.ACTIVE_TEMPLATE_FIELDS))
+        with mock.patch.object(TemplateService, "ACTIVE_TEMPLATE_FIELDS", fields):
+            template = TemplateService.get_active(self.tenant.tenant_id, "welcome")
+        self.assertEqual(template.id, self.template.id)
+        self.assertEqual(template.subject, "Subject {{ name }}")
+        self.assertEqual(template.body, "Body {{ name }}")
+        self.assertEqual(template.body_format, "Body {name}")
+
+    def test_cached_lookup_skips_the_database(self):
+        TemplateService.get_active(self.tenant.tenant_id, "welcome")
+        with self.assertNumQueries(0):
+            template = TemplateService.get_active(self.tenant.tenant_id, "welcome")
+        self.assertEqual(template.id, self.template.id)
+
+    def test_queryset_delete_invalidates(self):
+        TemplateService.get_active(self.tenant.tenant_id, "welcome")
+
+        Template.objects.filter(tenant=self.tenant).delete()
+
+        self.assertIsNone(TemplateService.get_active(self.tenant.tenant_id, "welcome"))
+
+    def test_save_invalidates(self):
+        TemplateService.get_active(self.tenant.tenant_id, "welcome")
+
+        self.template.is_active = False
+        self.template.save()
+
+        self.assertIsNone(TemplateService.get_active(self.tenant.tenant_id, "welcome"))
@@ -5,18 +5,72 @@ from rest_framework import status, viewsets
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from django.core.cache import cache
+from django.db.models import F
 from django.shortcuts import get_object_or_404
 
+from core_utils.pagination import CreatedAtCursorPagination
 from .models import Template, Notification, DeadLetter
+from .rendering import render_template
+from .services import TemplateService
 from .serializers import (
     TemplateSerializer,
     TemplateCreateSerializer,
     NotificationSerializer,
     NotifyRequestSerializer,
     NotifyResponseSerializer,
-    DeadLetterSerializer,
 )
-from .tasks import send_notification_task
+from .tasks import build_task_payload, build_task_record, send_notification_task
+
+
+# Columns read by NotificationSerializer. Keep in sync with its Meta.fields:
+# anything the serializer touches that is missing here costs one extra
+# query. provider_response is deliberately left out.
+NOTIFICATION_DETAIL_FIELDS = (
+    'id',
+    'channel',
+    'to',
+    'template',
+    'template__name',
+    'data',
+    'status',
+    'error_message',
+    'created_at',
+    'updated_at',
+    'sent_at',
+)
+
+# Columns returned per row by the notification list. Rows are read with
+# .values() and rendered directly, matching NotificationSerializer's output
+# without building a model instance and serializer field set per row;
+# template_name is added as an annotation.
+NOTIFICATION_LIST_VALUES = (
+    'id',
+    'channel',
+    'to',
+    'template',
+    'data',
+    'status',
+    'error_message',
+    'created_at',
+    'updated_at',
+    'sent_at',
+)
+
+# Seconds an accepted notification is served from the cache while it waits
+# for a worker to insert it; covers the task's insert retries
+ACCEPTED_NOTIFICATION_CACHE_TTL = 2 * 60 * 60
+
+# Columns returned per row by the dead letter list, read with .values() and
+# rendered directly like the notification list; matches DeadLetterSerializer's
+# output, with the notification's channel and recipient added as annotations.
+DEAD_LETTER_LIST_VALUES = (
+    'id',
+    'notification_id',
+    'reason',
+    'retry_count',
+    'created_at',
+)
 
 
 class NotifyView(APIView):
@@ -51,13 +105,8 @@ class NotifyView(APIView):
         template_id = data.get('template_id')
         
         if template_name:
-            try:
-                template = Template.objects.get(
-                    tenant=tenant,
-                    name=template_name,
-                    is_active=True
-                )
-            except Template.DoesNotExist:
+            template = TemplateService.get_active(tenant.tenant_id, template_name)
+            if template is None:
                 return Response(
                     {"error": f"Template '{template_name}' not found or inactive"},
                     status=status.HTTP_404_NOT_FOUND
@@ -65,7 +114,7 @@ class NotifyView(APIView):
         elif template_id:
             try:
                 template = Template.objects.get(
-                    tenant=tenant,
+                    tenant_id=tenant.tenant_id,
                     id=template_id,
                     is_active=True
                 )
@@ -75,8 +124,9 @@ class NotifyView(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
         
-        # Create the notification record
-        notification = Notification.objects.create(
+        # Build the notification; its id is generated here and the worker
+        # inserts the row, keeping the INSERT off the request path
+        notification = Notification(
             tenant=tenant,
             template=template,
             channel=data['channel'],
@@ -89,8 +139,21 @@ class NotifyView(APIView):
             status='pending'
         )
         
-        # Queue the notification for async processing
-        send_notification_task.delay(str(notification.id))
+        # Queue the notification for async processing, pre-rendered so the
+        # worker doesn't need to read it back
+        send_notification_task.delay(
+            str(notification.id),
+            payload=build_task_payload(notification),
+            record=build_task_record(notification),
+        )
+        
+        # Serve the detail endpoint from the cache until the worker has
+        # inserted the row
+        cache.set(
+            Notification.accepted_cache_key(tenant.tenant_id, notification.id),
+            dict(NotificationSerializer(notification).data),
+            ACCEPTED_NOTIFICATION_CACHE_TTL,
+        )
         
         # Return response
         return Response(
@@ -99,6 +162,7 @@ class NotifyView(APIView):
                 "status": notification.status,
                 "channel": notification.channel,
                 "to": notification.to,
+                # The worker inserts the row with this same timestamp
                 "created_at": notification.created_at,
             },
             status=status.HTTP_202_ACCEPTED
@@ -122,7 +186,7 @@ class TemplateViewSet(viewsets.ModelViewSet):
         """Filter templates by current tenant."""
         if not self.request.tenant:
             return Template.objects.none()
-        return Template.objects.filter(tenant=self.request.tenant)
+        return Template.objects.filter(tenant_id=self.request.tenant.tenant_id)
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -154,12 +218,7 @@ class TemplateViewSet(viewsets.ModelViewSet):
         sample_data = request.data.get('data', {})
         
         try:
-            from jinja2 import Template as Jinja2Template
-            
-            rendered_body = Jinja2Template(template.body).render(**sample_data)
-            rendered_subject = None
-            if template.subject:
-                rendered_subject = Jinja2Template(template.subject).render(**sample_data)
+            rendered_subject, rendered_body = render_template(template, sample_data)
             
             return Response({
                 "subject": rendered_subject,
@@ -179,6 +238,7 @@ class NotificationListView(APIView):
     GET /v1/notifications/
     GET /v1/notifications/?status=sent
     GET /v1/notifications/?channel=email
+    GET /v1/notifications/?cursor=<next cursor from previous page>
     """
     
     def get(self, request):
@@ -188,7 +248,9 @@ class NotificationListView(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
-        queryset = Notification.objects.filter(tenant=request.tenant)
+        queryset = Notification.objects.filter(
+            tenant_id=request.tenant.tenant_id
+        ).values(*NOTIFICATION_LIST_VALUES, template_name=F('template__name'))
         
         # Filter by status
         status_filter = request.query_params.get('status')
@@ -200,12 +262,15 @@ class NotificationListView(APIView):
         if channel_filter:
             queryset = queryset.filter(channel=channel_filter)
         
-        # Limit results
-        limit = int(request.query_params.get('limit', 100))
-        queryset = queryset[:limit]
+        paginator = CreatedAtCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
         
-        serializer = NotificationSerializer(queryset, many=True)
-        return Response(serializer.data)
+        for row in page:
+            # The serializer omits template_name for notifications without one
+            if row['template_name'] is None:
+                del row['template_name']
+        
+        return paginator.get_paginated_response(page)
 
 
 class NotificationDetailView(APIView):
@@ -223,11 +288,19 @@ class NotificationDetailView(APIView):
             )
         
         try:
-            notification = Notification.objects.get(
+            notification = Notification.objects.select_related(
+                'template'
+            ).only(*NOTIFICATION_DETAIL_FIELDS).get(
                 id=pk,
-                tenant=request.tenant
+                tenant_id=request.tenant.tenant_id
             )
         except Notification.DoesNotExist:
+            # Accepted by /v1/notify/ but not yet inserted by a worker
+            accepted = cache.get(
+                Notification.accepted_cache_key(request.tenant.tenant_id, pk)
+            )
+            if accepted is not None:
+                return Response(accepted)
             return Response(
                 {"error": "Notification not found"},
                 status=status.HTTP_404_NOT_FOUND
@@ -242,6 +315,7 @@ class DeadLetterListView(APIView):
     List dead letter entries for the current tenant.
     
     GET /v1/dead-letters/
+    GET /v1/dead-letters/?cursor=<next cursor from previous page>
     """
     
     def get(self, request):
@@ -252,14 +326,17 @@ class DeadLetterListView(APIView):
             )
         
         queryset = DeadLetter.objects.filter(
-            notification__tenant=request.tenant
-        ).select_related('notification')
+            tenant_id=request.tenant.tenant_id
+        ).values(
+            *DEAD_LETTER_LIST_VALUES,
+            notification_channel=F('notification__channel'),
+            notification_to=F('notification__to'),
+        )
         
-        limit = int(request.query_params.get('limit', 100))
-        queryset = queryset[:limit]
+        paginator = CreatedAtCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
         
-        serializer = DeadLetterSerializer(queryset, many=True)
-        return Response(serializer.data)
+        return paginator.get_paginated_response(page)
 
 
 
@@ -5,8 +5,9 @@ Extracts API key from request header, validates it, and sets request.tenant.
 import logging
 from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
+from rest_framework.throttling import BaseThrottle
 
-from .services import APIKeyService
+from .services import APIKeyService, APIKeyVerificationThrottled
 
 logger = logging.getLogger(__name__)
 
@@ -18,18 +19,19 @@ class APIKeyAuthenticationMiddleware(MiddlewareMixin):
     Extracts the API key from the X-API-KEY header, validates it,
     and sets request.tenant and request.api_key for downstream use.
     
-    Endpoints that don't require authentication should be listed in EXEMPT_PATHS.
+    Endpoints that don't require authentication should be listed in EXEMPT_PREFIXES.
     """
     
     # Header name for API key
     API_KEY_HEADER = "HTTP_X_API_KEY"
     
-    # Paths that don't require API key authentication
-    EXEMPT_PATHS = [
+    # Path prefixes that don't require API key authentication
+    # (a tuple, so str.startswith checks them all in one call)
+    EXEMPT_PREFIXES = (
         "/admin/",
         "/health/",
         "/v1/tenants/register/",  # Tenant registration doesn't need auth
-    ]
+    )
     
     def process_request(self, request):
         """Process incoming request and authenticate via API key."""
@@ -37,12 +39,10 @@ class APIKeyAuthenticationMiddleware(MiddlewareMixin):
         request.tenant = None
         request.api_key = None
         
-        # Check if path is exempt from authentication
-        if self._is_exempt_path(request.path):
-            return None
-        
         # Skip authentication for non-API paths (like static files)
-        if not request.path.startswith("/v1/"):
+        # and for exempt paths
+        path = request.path
+        if not path.startswith("/v1/") or self._is_exempt_path(path):
             return None
         
         # Extract API key from header
@@ -57,13 +57,23 @@ class APIKeyAuthenticationMiddleware(MiddlewareMixin):
                 status=401
             )
         
+        # Client address, resolved through NUM_PROXIES like DRF throttles
+        client_ident = BaseThrottle().get_ident(request)
+        
         # Verify the API key
-        api_key = APIKeyService.verify_key(api_key_raw)
+        try:
+            api_key = APIKeyService.verify_key(api_key_raw, client_ident)
+        except APIKeyVerificationThrottled:
+            return JsonResponse(
+                {
+                    "error": "Too many failed attempts",
+                    "detail": "Too many invalid API keys from this address; try again later"
+                },
+                status=429
+            )
         
         if not api_key:
-            logger.warning(
-                f"Invalid API key attempt from {request.META.get('REMOTE_ADDR')}"
-            )
+            logger.warning(f"Invalid API key attempt from {client_ident}")
             return JsonResponse(
                 {
                     "error": "Invalid API key",
@@ -89,17 +99,14 @@ class APIKeyAuthenticationMiddleware(MiddlewareMixin):
         request.tenant = api_key.tenant
         request.api_key = api_key
         
-        # Update last_used_at (async in production for performance)
+        # Update last_used_at (debounced, at most one write per key per minute)
         api_key.mark_used()
         
         return None
     
     def _is_exempt_path(self, path: str) -> bool:
         """Check if the path is exempt from authentication."""
-        for exempt_path in self.EXEMPT_PATHS:
-            if path.startswith(exempt_path):
-                return True
-        return False
+        return path.startswith(self.EXEMPT_PREFIXES)
 
 
 class TenantIsolationMiddleware(MiddlewareMixin):
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0001_initial'),
+    ]
+
+    operations = [
+        # key_hash is now a deterministic keyed hash and is looked up
+        # directly. Existing password hashes are replaced the first time
+        # each key is used (see APIKeyService._verify_legacy_key).
+        migrations.AlterField(
+            model_name='apikey',
+            name='key_hash',
+            field=models.CharField(help_text='Keyed BLAKE2b hash of the API key (Django password hash for legacy keys)', max_length=255, unique=True),
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_emails(apps, schema_editor):
+    """
+    Refuse to migrate while tenants share an email.
+
+    Registration used to check for an existing email in a separate query
+    before inserting, so concurrent sign-ups could both pass the check.
+    Which duplicate to keep is not something a migration can decide.
+    """
+    BusinessTenant = apps.get_model('tenants', 'BusinessTenant')
+    duplicates = list(
+        BusinessTenant.objects.values_list('email', flat=True)
+        .annotate(count=Count('pk'))
+        .filter(count__gt=1)
+        .order_by('email')
+    )
+    if duplicates:
+        raise RuntimeError(
+            "Cannot add a unique constraint on BusinessTenant.email: these "
+            "emails belong to more than one tenant: %s. Merge or rename the "
+            "duplicate tenants, then run the migration again."
+            % ", ".join(duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0003_apikey_tenant_created_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='businesstenant',
+            name='email',
+            field=models.EmailField(help_text='Contact email for the tenant', max_length=254, unique=True),
+        ),
+    ]
@@ -1,6 +1,10 @@
+import hashlib
+import hmac
 import uuid
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
-from django.contrib.auth.hashers import make_password, check_password
+from django.contrib.auth.hashers import check_password
 from django.utils import timezone
 
 
@@ -16,7 +20,7 @@ class BusinessTenant(models.Model):
         help_text="Unique identifier for the tenant"
     )
     name = models.CharField(max_length=255, help_text="Business/tenant name")
-    email = models.EmailField(help_text="Contact email for the tenant")
+    email = models.EmailField(unique=True, help_text="Contact email for the tenant")
     is_active = models.BooleanField(default=True, help_text="Whether the tenant is active")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -36,6 +40,9 @@ class APIKey(models.Model):
     Stores hashed API keys for tenant authentication.
     The actual API key should be shown only once during creation.
     """
+    # Minimum seconds between last_used_at writes for the same key
+    LAST_USED_WRITE_INTERVAL = 60
+
     tenant = models.ForeignKey(
         BusinessTenant,
         on_delete=models.CASCADE,
@@ -45,7 +52,7 @@ class APIKey(models.Model):
     key_hash = models.CharField(
         max_length=255,
         unique=True,
-        help_text="Hashed version of the API key"
+        help_text="Keyed BLAKE2b hash of the API key (Django password hash for legacy keys)"
     )
     name = models.CharField(
         max_length=100,
@@ -61,19 +68,52 @@ class APIKey(models.Model):
         verbose_name = "API Key"
         verbose_name_plural = "API Keys"
         ordering = ["-created_at"]
+        indexes = [
+            # Matches the key list's (-created_at, -id) cursor ordering
+            models.Index(
+                fields=["tenant", "-created_at", "-id"],
+                name="apikey_tenant_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"API Key for {self.tenant.name} ({self.name or 'Unnamed'})"
 
+    @staticmethod
+    def hash_key(raw_key: str) -> str:
+        """
+        Return the stored hash of a raw API key.
+
+        API keys are 256-bit random values, so a keyed MAC is enough; a slow
+        password hash adds nothing against guessing. Being deterministic,
+        the hash doubles as an indexed lookup on key_hash.
+        """
+        # Settings reject peppers over BLAKE2b's 64-byte key limit
+        pepper = settings.API_KEY_PEPPER.encode()
+        return hashlib.blake2b(raw_key.encode(), key=pepper).hexdigest()
+
+    def is_legacy_hash(self) -> bool:
+        """Whether key_hash is a Django password hash from before hash_key()."""
+        return "$" in self.key_hash
+
     def set_key(self, raw_key: str):
         """Hash and store the API key."""
-        self.key_hash = make_password(raw_key)
+        self.key_hash = self.hash_key(raw_key)
 
     def check_key(self, raw_key: str) -> bool:
         """Verify if the provided key matches the stored hash."""
-        return check_password(raw_key, self.key_hash)
+        if self.is_legacy_hash():
+            return check_password(raw_key, self.key_hash)
+        return hmac.compare_digest(self.key_hash, self.hash_key(raw_key))
 
     def mark_used(self):
-        """Update the last_used_at timestamp."""
+        """
+        Update the last_used_at timestamp.
+
+        Writes are coalesced through the cache: at most one UPDATE per key
+        every LAST_USED_WRITE_INTERVAL seconds, however many requests use it.
+        """
+        if not cache.add(f"apikey_used:{self.pk}", 1, timeout=self.LAST_USED_WRITE_INTERVAL):
+            return
         self.last_used_at = timezone.now()
-        self.save(update_fields=["last_used_at"])
+        APIKey.objects.filter(pk=self.pk).update(last_used_at=self.last_used_at)
@@ -1,6 +1,7 @@
 """
 Serializers for tenant management endpoints.
 """
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from .models import BusinessTenant, APIKey
 
@@ -27,17 +28,20 @@ class TenantRegistrationSerializer(serializers.Serializer):
     name = serializers.CharField(max_length=255)
     email = serializers.EmailField()
     
-    def validate_email(self, value):
-        """Ensure email is unique."""
-        if BusinessTenant.objects.filter(email=value).exists():
-            raise serializers.ValidationError(
-                "A tenant with this email already exists."
-            )
-        return value
-    
     def create(self, validated_data):
-        """Create a new tenant."""
-        return BusinessTenant.objects.create(**validated_data)
+        """
+        Create a new tenant.
+        
+        Email uniqueness is enforced by the database constraint rather
+        than checked with a separate query first.
+        """
+        try:
+            with transaction.atomic():
+                return BusinessTenant.objects.create(**validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({
+                'email': ['A tenant with this email already exists.']
+            }) from None
 
 
 class APIKeySerializer(serializers.ModelSerializer):
@@ -6,9 +6,16 @@ import secrets
 import string
 from typing import Tuple
 
+from django.conf import settings
+from django.core.cache import cache
+
 from .models import APIKey, BusinessTenant
 
 
+class APIKeyVerificationThrottled(Exception):
+    """Raised when a client has failed key verification too often."""
+
+
 class APIKeyService:
     """Service for generating and managing API keys."""
     
@@ -19,6 +26,24 @@ class APIKeyService:
     # Key length (excluding prefix) - 32 bytes = 256 bits of entropy
     KEY_LENGTH = 32
     
+    # Shortest string accepted as a key candidate; anything shorter is
+    # rejected without touching the database
+    MIN_KEY_LENGTH = 16
+    
+    # Failed legacy key scans allowed per client within the window; past
+    # that, verification from the client is refused until the window ends
+    MAX_LEGACY_FAILURES = 20
+    LEGACY_FAILURE_WINDOW = 60
+    
+    # Failed legacy key scans allowed across all clients within the window,
+    # so rotating source addresses can't get past MAX_LEGACY_FAILURES
+    MAX_GLOBAL_LEGACY_FAILURES = 50
+    GLOBAL_FAILURES_KEY = "apikey_failures_global"
+    
+    # APIKey columns loaded when authenticating a request. The tenant is
+    # loaded in full, since request.tenant is serialized by /tenants/me/.
+    AUTH_FIELDS = ('id', 'is_active', 'tenant')
+    
     @classmethod
     def generate_key(cls, is_test: bool = False) -> str:
         """
@@ -66,40 +91,114 @@ class APIKeyService:
         return api_key, plain_key
     
     @classmethod
-    def verify_key(cls, raw_key: str) -> APIKey | None:
+    def verify_key(cls, raw_key: str, client_ident: str | None = None) -> APIKey | None:
         """
         Verify an API key and return the associated APIKey instance.
         
-        This method iterates through active keys and checks each one.
-        For production with many keys, consider using a key prefix index
-        or caching strategy.
+        The key is hashed with APIKey.hash_key() and found with a single
+        indexed lookup on key_hash. Keys stored with a legacy password hash
+        are found by a scan and rehashed on first use.
         
         Args:
             raw_key: The plain API key to verify.
+            client_ident: Identifier of the calling client (e.g. its IP).
+                When given, clients whose keys keep failing the legacy scan
+                are throttled.
         
         Returns:
             The APIKey instance if valid, None otherwise.
+        
+        Raises:
+            APIKeyVerificationThrottled: If client_ident has failed the
+                legacy scan MAX_LEGACY_FAILURES times within the window, or
+                all clients together MAX_GLOBAL_LEGACY_FAILURES times.
         """
-        if not raw_key:
+        # Reject malformed keys before any hashing or queries
+        if (
+            not raw_key
+            or len(raw_key) < cls.MIN_KEY_LENGTH
+            or not raw_key.startswith((cls.PREFIX_LIVE, cls.PREFIX_TEST))
+        ):
             return None
         
-        # Filter active keys from active tenants
-        active_keys = APIKey.objects.filter(
+        key_hash = APIKey.hash_key(raw_key)
+        return cls._verify_by_hash(raw_key, key_hash, client_ident)
+    
+    @classmethod
+    def _verify_by_hash(
+        cls, raw_key: str, key_hash: str, client_ident: str | None
+    ) -> APIKey | None:
+        """Find the active key whose key_hash matches."""
+        try:
+            return APIKey.objects.select_related('tenant').only(
+                *cls.AUTH_FIELDS
+            ).get(
+                key_hash=key_hash,
+                is_active=True,
+                tenant__is_active=True
+            )
+        except APIKey.DoesNotExist:
+            return cls._verify_legacy_key(raw_key, key_hash, client_ident)
+    
+    @classmethod
+    def _verify_legacy_key(
+        cls, raw_key: str, key_hash: str, client_ident: str | None
+    ) -> APIKey | None:
+        """
+        Check raw_key against active keys that still have a password hash.
+        
+        Each legacy key costs a password hash check, so the scan is bounded:
+        it is skipped entirely when settings.LEGACY_API_KEY_SCAN is off, and
+        refused once the client, or all clients together, failed it too
+        often within the window.
+        """
+        if not settings.LEGACY_API_KEY_SCAN:
+            return None
+        
+        failures_key = f"apikey_failures:{client_ident}"
+        counts = cache.get_many([failures_key, cls.GLOBAL_FAILURES_KEY])
+        if (
+            counts.get(cls.GLOBAL_FAILURES_KEY, 0) >= cls.MAX_GLOBAL_LEGACY_FAILURES
+            or (
+                client_ident is not None
+                and counts.get(failures_key, 0) >= cls.MAX_LEGACY_FAILURES
+            )
+        ):
+            raise APIKeyVerificationThrottled()
+        
+        legacy_keys = APIKey.objects.filter(
             is_active=True,
-            tenant__is_active=True
+            tenant__is_active=True,
+            key_hash__contains='$'
         ).select_related('tenant')
         
-        for api_key in active_keys:
+        for api_key in legacy_keys:
             if api_key.check_key(raw_key):
+                # Rehash so the next request takes the indexed path
+                APIKey.objects.filter(pk=api_key.pk).update(key_hash=key_hash)
+                api_key.key_hash = key_hash
                 return api_key
         
+        cls._record_failure(cls.GLOBAL_FAILURES_KEY)
+        if client_ident is not None:
+            cls._record_failure(failures_key)
         return None
     
+    @classmethod
+    def _record_failure(cls, failures_key: str) -> None:
+        """Count a failed attempt; the count expires with the window."""
+        cache.add(failures_key, 0, timeout=cls.LEGACY_FAILURE_WINDOW)
+        try:
+            cache.incr(failures_key)
+        except ValueError:
+            # Expired between add() and incr()
+            cache.add(failures_key, 1, timeout=cls.LEGACY_FAILURE_WINDOW)
+    
     @classmethod
     def deactivate_key(cls, api_key: APIKey) -> None:
         """Deactivate an API key."""
+        APIKey.objects.filter(pk=api_key.pk).update(is_active=False)
         api_key.is_active = False
-        api_key.save(update_fields=['is_active'])
     
     @classmethod
     def rotate_key(
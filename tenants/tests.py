@@ -1,3 +1,94 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .models import APIKey, BusinessTenant
+from .services import APIKeyService, APIKeyVerificationThrottled
+
+# Keeps tests off the shared Redis cache
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class APIKeyListQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = BusinessTenant.objects.create(name="Acme", email="ops@acme.test")
+        _, cls.raw_key = APIKeyService.create_api_key(cls.tenant)
+        for i in range(4):
+            APIKeyService.create_api_key(cls.tenant, name=f"key {i}")
+
+    def setUp(self):
+        cache.clear()
+        # The first request writes last_used_at; later ones only read the key
+        self.client.get("/v1/tenants/me/", HTTP_X_API_KEY=self.raw_key)
+
+    def test_api_key_list(self):
+        # API key lookup, then one page query with the tenant joined
+        with self.assertNumQueries(2):
+            response = self.client.get("/v1/api-keys/", HTTP_X_API_KEY=self.raw_key)
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(len(results), 5)
+        self.assertEqual({row["tenant_name"] for row in results}, {"Acme"})
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.PBKDF2PasswordHasher"],
+)
+class LegacyKeyTests(TestCase):
+    """Keys stored with a PBKDF2 password hash still verify, once."""
+
+    raw_key = "sk_live_" + "a" * 43
+
+    def setUp(self):
+        cache.clear()
+        self.tenant = BusinessTenant.objects.create(name="Acme", email="ops@acme.test")
+        self.api_key = APIKey.objects.create(
+            tenant=self.tenant, key_hash=make_password(self.raw_key)
+        )
+
+    def test_legacy_key_verifies_and_is_rehashed(self):
+        self.assertTrue(self.api_key.is_legacy_hash())
+
+        self.assertEqual(APIKeyService.verify_key(self.raw_key), self.api_key)
+
+        self.api_key.refresh_from_db()
+        self.assertEqual(self.api_key.key_hash, APIKey.hash_key(self.raw_key))
+        self.assertFalse(self.api_key.is_legacy_hash())
+        # Later requests take the indexed key_hash lookup
+        with self.assertNumQueries(1):
+            self.assertEqual(APIKeyService.verify_key(self.raw_key), self.api_key)
+
+    def test_wrong_key_is_rejected_and_not_rehashed(self):
+        self.assertIsNone(APIKeyService.verify_key("sk_live_" + "b" * 43))
+
+        self.api_key.refresh_from_db()
+        self.assertTrue(self.api_key.check_key(self.raw_key))
+        self.assertTrue(self.api_key.is_legacy_hash())
+
+    def test_scan_is_capped_across_clients(self):
+        wrong_key = "sk_live_" + "b" * 43
+        # One failure per address, as from rotating source IPs
+        with mock.patch.object(APIKey, "check_key", return_value=False):
+            for i in range(APIKeyService.MAX_GLOBAL_LEGACY_FAILURES):
+                APIKeyService.verify_key(wrong_key, client_ident=f"10.0.0.{i}")
+
+        with mock.patch.object(APIKey, "check_key") as check_key:
+            with self.assertRaises(APIKeyVerificationThrottled):
+                APIKeyService.verify_key(wrong_key, client_ident="10.0.1.1")
+        check_key.assert_not_called()
+        # Keys already rehashed are unaffected
+        _, raw_key = APIKeyService.create_api_key(self.tenant)
+        self.assertIsNotNone(APIKeyService.verify_key(raw_key, "10.0.1.1"))
+
+    @override_settings(LEGACY_API_KEY_SCAN=False)
+    def test_scan_can_be_turned_off(self):
+        with mock.patch.object(APIKey, "check_key") as check_key:
+            self.assertIsNone(APIKeyService.verify_key(self.raw_key))
+        check_key.assert_not_called()
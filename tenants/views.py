@@ -5,6 +5,7 @@ from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
+from core_utils.pagination import CreatedAtCursorPagination
 from .models import BusinessTenant, APIKey
 from .serializers import (
     BusinessTenantSerializer,
@@ -16,6 +17,18 @@ from .serializers import (
 from .services import APIKeyService
 
 
+# Columns read by APIKeySerializer; key_hash is never loaded for listing
+API_KEY_LIST_FIELDS = (
+    'id',
+    'tenant',
+    'tenant__name',
+    'name',
+    'is_active',
+    'created_at',
+    'last_used_at',
+)
+
+
 class TenantRegistrationView(APIView):
     """
     Register a new tenant and receive an API key.
@@ -77,6 +90,7 @@ class APIKeyListCreateView(APIView):
     List and create API keys for the current tenant.
     
     GET /v1/api-keys/
+    GET /v1/api-keys/?cursor=<next cursor from previous page>
     POST /v1/api-keys/
     """
     
@@ -88,9 +102,16 @@ class APIKeyListCreateView(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
-        api_keys = APIKey.objects.filter(tenant=request.tenant)
-        serializer = APIKeySerializer(api_keys, many=True)
-        return Response(serializer.data)
+        # tenant_name is read per row by the serializer; join it up front
+        api_keys = APIKey.objects.filter(
+            tenant_id=request.tenant.tenant_id
+        ).select_related('tenant').only(*API_KEY_LIST_FIELDS)
+        
+        paginator = CreatedAtCursorPagination()
+        page = paginator.paginate_queryset(api_keys, request, view=self)
+        
+        serializer = APIKeySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
     
     def post(self, request):
         """Create a new API key for the current tenant."""
@@ -136,7 +157,7 @@ class APIKeyDeactivateView(APIView):
             )
         
         try:
-            api_key = APIKey.objects.get(pk=pk, tenant=request.tenant)
+            api_key = APIKey.objects.get(pk=pk, tenant_id=request.tenant.tenant_id)
         except APIKey.DoesNotExist:
             return Response(
                 {"error": "API key not found"},